@@ -9,8 +9,10 @@ from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
 import asyncio
+import functools
 import os
 import logging
+import sys
 
 # Load environment variables
 load_dotenv()
@@ -19,9 +21,31 @@ TOKEN = os.getenv("TOKEN")
 # Get logger for current module
 logger = logging.getLogger(__name__)
 
-# Create bot with default intents
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="/", intents=intents)
+# Use the faster uvloop event loop where it is supported. This has to happen
+# before the bot is created, since the bot grabs the event loop on creation.
+if sys.platform != "win32":
+    import uvloop
+    uvloop.install()
+
+# Create bot with only the guilds intent. Slash commands don't need any other
+# intents, and the guild cache is needed to look up the moderator role.
+intents = discord.Intents.none()
+intents.guilds = True
+
+# Slash commands are registered with deploy_commands.py instead of on every startup
+bot = commands.Bot(
+    command_prefix="/",
+    intents=intents,
+    auto_sync_commands=False,
+    chunk_guilds_at_startup=False,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    max_messages=None
+)
+
+# Option choices for the slash commands, built once at startup
+COURSE_CHOICES = [discord.OptionChoice(course) for course in COURSES]
+NINE_CHOICES = [discord.OptionChoice(nine) for nine in NINES]
+CHARACTER_CHOICES = [discord.OptionChoice(character) for character in CHARACTERS]
 
 ################################################################################
 # BOT EVENTS
@@ -30,8 +54,8 @@ bot = commands.Bot(command_prefix="/", intents=intents)
 @bot.event
 async def on_ready():
     """
-    Event that prints the bot's username and user ID to the console when the bot
-    successfully logs in to Discord.
+    Event that logs the bot's username and user ID when the bot successfully
+    logs in to Discord.
 
     Parameters:
         none
@@ -40,20 +64,79 @@ async def on_ready():
         none
     """
 
-    print(f'Logged in as {bot.user.name} - {bot.user.id}')
-    print('------')
+    logger.info("Logged in as %s - %s", bot.user.name, bot.user.id)
 
-    generate_rankings_task.start()
-    update_difficulty_indices_task.start()
+    # on_ready also fires after reconnecting, so only start the task once. The
+    # maintenance task is started by the difficulty indices task once its first
+    # run has finished.
+    if not update_difficulty_indices_task.is_running():
+        update_difficulty_indices_task.start()
 
-    # Wait for 1 hour after bot logs on
-    await asyncio.sleep(3600)
-    sync_spreadsheet_with_database_task.start()
+
+@bot.event
+async def on_error(event_method, *args, **kwargs):
+    """
+    Event that logs exceptions raised by the other event handlers.
+
+    Parameters:
+        event_method (str): The name of the event that raised the exception.
+
+    Returns:
+        none
+    """
+
+    logger.exception("Ignoring exception in %s", event_method)
+
+
+@bot.event
+async def on_application_command_error(ctx, error):
+    """
+    Event that logs exceptions raised by the slash commands.
+
+    Parameters:
+        ctx: The context of the command.
+        error (discord.DiscordException): The exception that was raised.
+
+    Returns:
+        none
+    """
+
+    logger.error("Ignoring exception in command %s", ctx.command, exc_info=error)
 
 ################################################################################
 # BOT SLASH COMMANDS
 ################################################################################
 
+async def run_command(command, ctx, *args):
+    """
+    Run a bot command in a worker thread and send its response.
+
+    The bot commands query the database and the Sheets API synchronously, so
+    running them in a worker thread keeps the event loop free to handle other
+    commands in the meantime. If the command fails, the error is logged and the
+    user is told, since the interaction has already been deferred and would
+    otherwise be left waiting for a response.
+
+    Parameters:
+        command (callable): The bot command to run.
+        ctx: The context of the command.
+        args: The arguments to pass to the bot command.
+
+    Returns:
+        none
+    """
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        response = await loop.run_in_executor(None, command, ctx, *args)
+        if response is not None:
+            await response
+    except Exception:
+        logger.exception("An error occured while running command %s.", ctx.command)
+        await ctx.respond("Something went wrong while running this command.", ephemeral=True)
+
+
 @bot.slash_command(name="pick18", description="Picks a random 18-hole course.")
 async def pick18(ctx):
     """
@@ -112,7 +195,8 @@ async def change_name(ctx, new_name):
         none
     """
 
-    await bot_commands.change_player_display_name(ctx, new_name)
+    await ctx.defer()
+    await run_command(bot_commands.change_player_display_name, ctx, new_name)
 
 
 @bot.slash_command(name="top10", description="Get the top 10 players in the rankings.")
@@ -126,7 +210,8 @@ async def get_top_10(ctx):
     Returns:
         none
     """
-    await bot_commands.get_top_10_table(ctx)
+    await ctx.defer()
+    await run_command(bot_commands.get_top_10_table, ctx)
 
 
 @bot.slash_command(name="difficulty_indices", description="Get the difficulty indices for each course.")
@@ -140,7 +225,8 @@ async def get_difficulty_indices(ctx):
     Returns:
         none
     """
-    await bot_commands.get_difficulty_indices_table(ctx)
+    await ctx.defer()
+    await run_command(bot_commands.get_difficulty_indices_table, ctx)
 
 
 @bot.slash_command(name="top_scores", description="Get the all-time best scores in the server.")
@@ -155,7 +241,8 @@ async def generate_top_scores(ctx):
         none
     """
 
-    await bot_commands.generate_top_scores_table(ctx)
+    await ctx.defer()
+    await run_command(bot_commands.generate_top_scores_table, ctx)
 
 
 @bot.slash_command(name="server_records", description="Get the course records for the server.")
@@ -170,7 +257,8 @@ async def generate_server_records(ctx):
         none
     """
 
-    await bot_commands.generate_server_records_table(ctx)
+    await ctx.defer()
+    await run_command(bot_commands.generate_server_records_table, ctx)
 
 
 @bot.slash_command(name="personal_records", description="Get a player's personal records.")
@@ -187,7 +275,8 @@ async def generate_personal_records(ctx, player_id):
         none
     """
 
-    await bot_commands.generate_personal_records_table(ctx, player_id)
+    await ctx.defer()
+    await run_command(bot_commands.generate_personal_records_table, ctx, player_id)
 
 
 @bot.slash_command(name="profile", description="Get a player's profile.")
@@ -203,7 +292,8 @@ async def get_profile(ctx, player_id):
         none
     """
 
-    await bot_commands.get_player_profile(ctx, player_id)
+    await ctx.defer()
+    await run_command(bot_commands.get_player_profile, ctx, player_id)
 
 
 @bot.slash_command(name="recent_scores", description="Get your 40 most recent scores.")
@@ -219,13 +309,14 @@ async def get_recent_scores(ctx, player_id):
         none
     """
 
-    await bot_commands.get_recent_score_table(ctx, player_id)
+    await ctx.defer()
+    await run_command(bot_commands.get_recent_score_table, ctx, player_id)
 
 
 @bot.slash_command(name="submit_score", description="Submit a score into into the queue to be verified.")
-@option("course", choices=COURSES, description="Enter the course")
-@option("nine", choices=NINES, description="Enter the nine")
-@option("character", choices=CHARACTERS, description="Enter the character")
+@option("course", choices=COURSE_CHOICES, description="Enter the course")
+@option("nine", choices=NINE_CHOICES, description="Enter the nine")
+@option("character", choices=CHARACTER_CHOICES, description="Enter the character")
 @option("score", description="Enter the score in terms of +/- par")
 async def submit_score(ctx, course, nine, character, score: int):
     """
@@ -242,7 +333,8 @@ async def submit_score(ctx, course, nine, character, score: int):
         none
     """
 
-    await bot_commands.add_score_to_queue(ctx, course, nine, character, score)
+    await ctx.defer()
+    await run_command(bot_commands.add_score_to_queue, ctx, course, nine, character, score)
 
 
 @bot.slash_command(name="verify", description="(Moderators only). Verify a score for a pending round.")
@@ -259,7 +351,8 @@ async def verify(ctx, round_id):
         none
     """
 
-    await bot_commands.verify_score(ctx, round_id)
+    await ctx.defer()
+    await run_command(bot_commands.verify_score, ctx, round_id)
 
 
 @bot.slash_command(name="remove_score", description="(Moderators only). Remove a pending score from the queue.")
@@ -276,7 +369,8 @@ async def remove_score(ctx, round_id):
         none
     """
 
-    await bot_commands.remove_score_from_queue(ctx, round_id)
+    await ctx.defer(ephemeral=True)
+    await run_command(bot_commands.remove_score_from_queue, ctx, round_id)
 
 
 @bot.slash_command(name="sync_spreadsheet", description="(Moderators only). Syncs scores spreadsheet with database.")
@@ -291,7 +385,8 @@ async def sync_spreadsheet(ctx):
         none
     """
 
-    await bot_commands.sync_spreadsheet_with_database(ctx)
+    await ctx.defer(ephemeral=True)
+    await run_command(bot_commands.sync_spreadsheet_with_database, ctx)
 
 
 @bot.slash_command(name="update_database", description="(Moderators only). Updates scores using spreadsheet, then recalculates player ratings.")
@@ -306,19 +401,40 @@ async def update_database(ctx):
         none
     """
 
-    await bot_commands.update_database_from_spreadsheet(ctx)
+    await ctx.defer(ephemeral=True)
+    await run_command(bot_commands.update_database_from_spreadsheet, ctx)
+
+
+@bot.slash_command(name="recalculate_ratings", description="(Moderators only). Recalculates the adjusted scores and ratings of every player.")
+async def recalculate_ratings(ctx):
+    """
+    Slash command to recalculate every player's adjusted scores and rating.
+
+    Parameters:
+        ctx: The context of the command.
+
+    Returns:
+        none
+    """
+
+    await ctx.defer(ephemeral=True)
+    await run_command(bot_commands.recalculate_ratings, ctx)
 
 ################################################################################
 # BOT TASKS
 ################################################################################
 
 @tasks.loop(hours=12.0)
-async def generate_rankings_task():
+async def periodic_maintenance_task():
     """
-    Task that generates rankings and updates the rankings spreadsheet.
+    Task that updates the rankings and syncs the spreadsheet with the database.
 
-    This task runs every 12 hours and updates the rankings sheet with the latest
-    data.
+    This task runs every 12 hours. It generates the rankings, updates the
+    rankings sheet and pre-renders the top 10 and difficulty indices tables,
+    then appends the scores added since the last sync to the scores
+    spreadsheet. The jobs run one after the other so they don't compete for the
+    database and the Sheets API quota, and a failing job doesn't stop the
+    remaining jobs from running.
 
     Parameters:
         none
@@ -327,19 +443,37 @@ async def generate_rankings_task():
         none
     """
 
-    bot_commands.generate_rankings_table()
+    loop = asyncio.get_running_loop()
 
-
-@tasks.loop(hours=12.0)
-async def sync_spreadsheet_with_database_task():
+    try:
+        await loop.run_in_executor(None, bot_commands.generate_rankings_table)
+        await loop.run_in_executor(None, bot_commands.refresh_table_images)
+    except Exception:
+        logger.exception("An error occured while updating the rankings.")
 
     logger.info("Syncing spreadsheet with database...")
 
     try:
-        utils.fill_db_spreadsheet()
+        await loop.run_in_executor(None, functools.partial(utils.fill_db_spreadsheet, incremental=True))
         logger.info("Synced spreadsheet with database.")
-    except:
-        logger.error("An error occured while syncing the spreadsheet. Please try again later.")
+    except Exception:
+        logger.exception("An error occured while syncing the spreadsheet.")
+
+
+@periodic_maintenance_task.before_loop
+async def before_periodic_maintenance_task():
+    """
+    Wait until the bot is ready before running the maintenance task for the
+    first time.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    await bot.wait_until_ready()
 
 
 @tasks.loop(hours=700.0)
@@ -349,7 +483,10 @@ async def update_difficulty_indices_task():
     spreadsheet.
 
     This task runs every 700 hours (approximately once a month) and updates
-    the difficulty indices and associated spreadsheet.
+    the difficulty indices and associated spreadsheet, then recalculates the
+    player ratings using the new indices. The maintenance task is started after
+    the first run, so it doesn't update the rankings at the same time as the
+    ratings are being recalculated.
 
     Parameters:
         none
@@ -364,11 +501,41 @@ async def update_difficulty_indices_task():
     logger.info("Updating difficulty indices...")
 
     try:
-        bot_commands.update_difficulty_indices()
-        bot_commands.generate_difficulty_indices_sheet()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, bot_commands.update_difficulty_indices)
+        await loop.run_in_executor(None, bot_commands.generate_difficulty_indices_sheet)
         logger.info("Finished updating difficulty indices.")
-    except:
-        logger.error("An error occured while updating difficulty indices. Please try again later.")
+
+        # The adjusted scores depend on the difficulty indices, so the ratings
+        # have to be recalculated whenever the indices change
+        logger.info("Recalculating player ratings...")
+        await loop.run_in_executor(None, bot_commands.update_adjusted_scores)
+        await loop.run_in_executor(None, bot_commands.update_player_ratings)
+        logger.info("Finished recalculating player ratings.")
+    except Exception:
+        logger.exception("An error occured while updating difficulty indices.")
+
+    # The maintenance task renders the rankings from the ratings, so it is
+    # only started after they have been recalculated, or failed to be, on
+    # startup
+    if not periodic_maintenance_task.is_running():
+        periodic_maintenance_task.start()
+
+
+@update_difficulty_indices_task.before_loop
+async def before_update_difficulty_indices_task():
+    """
+    Wait until the bot is ready before running the difficulty indices task for
+    the first time.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    await bot.wait_until_ready()
 
 ################################################################################
 # BOT INITIALIZATION FUNCTION
@@ -15,13 +15,17 @@ import utils
 from dotenv import load_dotenv
 import discord
 
-from collections import defaultdict
+from collections import Counter, deque
 from datetime import datetime
-import math
+from functools import lru_cache
+import io
+from itertools import groupby
 import random
 import logging
+from operator import itemgetter
 import os
 import string
+import time
 
 # Load environment variables
 load_dotenv()
@@ -31,6 +35,94 @@ SCORE_SUBMISSION_THREAD_LINK = os.getenv("SCORE_SUBMISSION_THREAD_LINK")
 # Get logger for current module
 logger = logging.getLogger(__name__)
 
+# Minimum number of scores a player needs to be rated
+MIN_REQUIRED_SCORES = 6
+
+# Number of most recent scores a player's rating is averaged over
+ROLLING_AVERAGE_WINDOW = 40
+
+# Every nine that can be picked by /pick9, formatted for posting
+NINE_HOLE_COURSES = tuple(f"{course} ({nine})" for course in COURSES for nine in NINES)
+
+# Set of the character names, for validating the characters in the spreadsheet
+_CHARACTERS_SET = frozenset(CHARACTERS)
+
+# Characters a round ID hash is made up of
+_HASH_ALPHABET = string.ascii_letters + string.digits
+
+# Course name and nine of each course ID, indexed by course ID
+COURSE_NINE = (None,) + tuple((course, nine) for course in COURSES for nine in NINES)
+
+# Number of seconds before the cached player names are refreshed
+PLAYER_NAME_CACHE_TTL = 60
+
+# In-memory mapping of player IDs to display names
+_player_name_cache = {}
+_player_name_cache_ts = None
+
+# Bumped whenever the player names change, so names read before the change are
+# not kept in the cache
+_player_name_cache_version = 0
+
+# Number of seconds before the cached difficulty indices are refreshed
+DIFFICULTY_INDEX_CACHE_TTL = 300
+
+# In-memory copy of the difficulty indices, ordered by course ID
+_difficulty_index_cache = None
+_difficulty_index_cache_ts = None
+
+# Number of seconds before a pre-rendered table image is rendered again
+TABLE_IMAGE_CACHE_TTL = 300
+
+# Pre-rendered table images, keyed by table name. Each entry holds the image,
+# the time it was rendered and the version it was rendered from.
+_table_image_cache = {}
+
+# Bumped whenever a table's data changes, keyed by table name, so images
+# rendered before the change are no longer used
+_table_image_versions = {}
+
+# Number of seconds before a cached player table image is rendered again
+PLAYER_TABLE_CACHE_TTL = 60
+
+# Rendered player table images, keyed by command and player ID. Each entry holds
+# the image, the time it was rendered and the version it was rendered from.
+_player_table_cache = {}
+
+# Bumped whenever scores or player names change, so player table images
+# rendered before the change are no longer used
+_player_table_version = 0
+
+# Whether any ratings changed since the rankings sheet was last written
+_rankings_changed = True
+
+################################################################################
+# DATABASE QUERIES
+################################################################################
+
+PLAYER_NAMES_QUERY = f"""
+    SELECT discord_id, player_name
+    FROM {PLAYERS_TABLE};
+"""
+
+PENDING_SCORE_INSERT_QUERY = f"""
+    INSERT INTO {PENDING_SCORES_TABLE} (timestamp, hash, course_id, player_id, player_name, character, score)
+    VALUES (%s, %s, %s, %s, %s, %s, %s);
+"""
+
+PENDING_ROUND_QUERY = f"""
+    SELECT timestamp, course_id, player_id, character, score, player_name
+    FROM {PENDING_SCORES_TABLE}
+    WHERE hash = %s
+    LIMIT 1;
+"""
+
+DIFFICULTY_INDICES_QUERY = f"""
+    SELECT difficulty_index
+    FROM {COURSES_TABLE}
+    ORDER BY course_id;
+"""
+
 ################################################################################
 # BOT USER COMMANDS
 ################################################################################
@@ -46,8 +138,7 @@ def pick18(ctx):
         str: The chosen golf course.
     """
 
-    course = random.choice(COURSES)
-    return ctx.respond(f"{course}")
+    return ctx.respond(random.choice(COURSES))
 
 
 def pick9(ctx):
@@ -61,9 +152,7 @@ def pick9(ctx):
         str: The chosen nine.
     """
 
-    course = random.choice(COURSES)
-    nine = random.choice(NINES)
-    return ctx.respond(f"{course} ({nine})")
+    return ctx.respond(random.choice(NINE_HOLE_COURSES))
     
 
 def get_rankings_sheet(ctx):
@@ -89,14 +178,7 @@ def change_player_display_name(ctx, new_name):
     
     player_id = ctx.author.id
 
-    # Get all player IDs from the database
-    query = f"""
-        SELECT discord_id
-        FROM {PLAYERS_TABLE}
-    """
-    player_ids = [item[0] for item in db_helper.select(query)]
-
-    if player_id not in player_ids:
+    if player_id not in get_player_names():
         return ctx.respond("You must have at least one score verified to change your name.")
     
     # Update display name in database with the new name
@@ -106,10 +188,42 @@ def change_player_display_name(ctx, new_name):
         WHERE p.discord_id = %s;
     """
     db_helper.update_single(update_query, (new_name, player_id))
+    invalidate_player_name_cache()
+
+    # The new name has to show up on the rankings sheet and the top 10 table too
+    mark_ratings_changed()
 
     return ctx.respond(f"You changed your name to {new_name}.")
 
 
+def format_score(score):
+    """
+    Format a score so that it always shows its sign.
+
+    Parameters:
+        score (int): The score relative to par.
+
+    Returns:
+        str: The formatted score, e.g. "+3", "-2" or "±0".
+    """
+
+    return f"{score:+d}" if score != 0 else "±0"
+
+
+def format_date(timestamp):
+    """
+    Format a Unix timestamp as a date in local time.
+
+    Parameters:
+        timestamp (int): The Unix timestamp.
+
+    Returns:
+        str: The date formatted as YYYY-MM-DD.
+    """
+
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
 def get_hash():
     """
     Generate a random 16 character alphanumeric hash.
@@ -121,13 +235,16 @@ def get_hash():
         str: A randomly generated hash.
     """
 
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=16))
+    return ''.join(random.choices(_HASH_ALPHABET, k=16))
 
 
+@lru_cache(maxsize=None)
 def get_course_id(course, nine):
     """
     Retrieve the ID of a golf course based on its details.
 
+    Course IDs never change, so the results are cached after the first lookup.
+
     Parameters:
         course (str): The name of the golf course.
         nine (str): The nine played.
@@ -151,10 +268,13 @@ def get_course_id(course, nine):
         raise ValueError("Course details not found.")
 
 
+@lru_cache(maxsize=None)
 def get_course_info(course_id: int):
     """
     Retrieve the course name, round format, tees and greens based on a course ID.
 
+    Course names never change, so the results are cached after the first lookup.
+
     Parameters:
         course_id: The ID of the golf course.
 
@@ -179,17 +299,59 @@ def get_course_info(course_id: int):
         raise ValueError("Course details not found.")
     
 
-def get_player_name(player_id: int):
-    
-    query = f"""
-        SELECT player_name
-        FROM {PLAYERS_TABLE}
-        WHERE discord_id = %s
+def get_player_names():
     """
-    result = db_helper.select(query, (player_id,))
+    Retrieve the display names of all players.
 
-    if result:
-        return result[0][0]
+    The names are kept in memory and only re-read from the database once the
+    cache has expired or been invalidated.
+
+    Parameters:
+        none
+
+    Returns:
+        dict: The players' display names, keyed by player ID.
+    """
+
+    global _player_name_cache, _player_name_cache_ts
+
+    now = time.monotonic()
+    if _player_name_cache_ts is None or now - _player_name_cache_ts >= PLAYER_NAME_CACHE_TTL:
+        # Read the version before reloading, so names read while a change is
+        # being made aren't cached once the change is recorded
+        version = _player_name_cache_version
+        player_names = dict(db_helper.iter_select(PLAYER_NAMES_QUERY))
+        if version != _player_name_cache_version:
+            return player_names
+
+        _player_name_cache = player_names
+        _player_name_cache_ts = now
+
+    return _player_name_cache
+
+
+def invalidate_player_name_cache():
+    """
+    Force the player names to be re-read from the database on the next lookup.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    global _player_name_cache_ts, _player_name_cache_version
+    _player_name_cache_ts = None
+    _player_name_cache_version += 1
+
+
+def get_player_name(player_id: int):
+
+    player_name = get_player_names().get(player_id)
+
+    if player_name is not None:
+        return player_name
     else:
         raise ValueError("Player not found.")
 
@@ -225,19 +387,10 @@ def add_score_to_queue(ctx, course, nine, character, score):
 
     try:
         course_id = get_course_id(course, nine)
-        query = f"""
-            INSERT INTO {PENDING_SCORES_TABLE} (timestamp, hash, course_id, player_id, player_name, character, score)
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
-        """
         values = (timestamp, new_hash, course_id, player_id, player_name, character, score)
-        db_helper.insert_single(query, values)
+        db_helper.insert_single(PENDING_SCORE_INSERT_QUERY, values)
 
-        # Make it so it always shows the sign of the score
-        score_str = str(score)
-        if score == 0:
-            score_str = f"±{score}"
-        if score > 0:
-            score_str = f"+{score}"
+        score_str = format_score(score)
 
         moderator_role = utils.get_moderator_role(ctx)
         message = f"{moderator_role.mention} New score to be verified: `{player_name}: {character}, {score_str} @ {course} ({nine})` (Round ID: {new_hash})"
@@ -248,35 +401,6 @@ def add_score_to_queue(ctx, course, nine, character, score):
         return ctx.respond(f"Error: {e}")
 
 
-def is_queue_empty():
-    """
-    Check if the pending scores queue is empty.
-
-    Parameters:
-        none
-
-    Returns:
-        bool: True if the queue is empty, False otherwise.
-
-    Raises:
-        Exception: If there is an error during the database interaction.
-    """
-
-    query = f"""
-        SELECT NOT EXISTS (
-            SELECT 1 
-            FROM {PENDING_SCORES_TABLE} 
-            LIMIT 1
-        );
-    """
-    try:
-        empty = db_helper.select(query)[0][0]
-        return empty
-    except Exception:
-        # Assume queue is empty
-        return True
-
-
 def get_pending_round(hash):
     """
     Retrieve pending round details using the round's hash.
@@ -292,14 +416,8 @@ def get_pending_round(hash):
         Exception: If there is an error during the database interaction.
     """
 
-    query = f"""
-        SELECT timestamp, course_id, player_id, character, score, player_name
-        FROM {PENDING_SCORES_TABLE}
-        WHERE hash = %s
-        LIMIT 1;
-    """
     try:
-        pending_round = db_helper.select(query, (hash,))
+        pending_round = db_helper.select(PENDING_ROUND_QUERY, (hash,))
         return pending_round[0] if pending_round else None
     except Exception:
         return None
@@ -309,6 +427,10 @@ def get_difficulty_indices():
     """
     Retrieve difficulty indices of all courses.
 
+    The indices only change when they are recalculated, so they are kept in
+    memory and re-read from the database once the cache has expired or been
+    invalidated.
+
     Parameters:
         none
 
@@ -319,18 +441,38 @@ def get_difficulty_indices():
         Exception: If there is an error during the database interaction.
     """
 
-    query = f"""
-        SELECT difficulty_index
-        FROM {COURSES_TABLE}
-        ORDER BY course_id;
-    """
+    global _difficulty_index_cache, _difficulty_index_cache_ts
+
+    now = time.monotonic()
+    if _difficulty_index_cache is not None and now - _difficulty_index_cache_ts < DIFFICULTY_INDEX_CACHE_TTL:
+        return _difficulty_index_cache
+
     try:
         difficulty_indices = [element[0]
-                              for element in db_helper.select(query)]
-        return difficulty_indices
+                              for element in db_helper.select(DIFFICULTY_INDICES_QUERY)]
     except Exception:
         return []
 
+    _difficulty_index_cache = difficulty_indices
+    _difficulty_index_cache_ts = now
+    return difficulty_indices
+
+
+def invalidate_difficulty_index_cache():
+    """
+    Force the difficulty indices to be re-read from the database on the next
+    lookup.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    global _difficulty_index_cache
+    _difficulty_index_cache = None
+
 
 def verify_score(ctx, hash):
     """
@@ -352,23 +494,22 @@ def verify_score(ctx, hash):
         return ctx.respond("You don't have permission to use this command.")
 
     try:
-        if is_queue_empty():
-            return ctx.respond("Queue is currently empty.")
-
         pending_round = get_pending_round(hash)
         if not pending_round:
             return ctx.respond("ID not found in queue.")
 
         timestamp, course_id, player_id, character, score, player_name = pending_round
 
-        # Check for personal record
+        # Get the player's personal record and the server record for the course
         query = f"""
-            SELECT MIN(score) AS personal_record
+            SELECT MIN(score) FILTER (WHERE player_id = %s) AS personal_record,
+                   MIN(score) AS server_record
             FROM {SCORES_TABLE}
-            WHERE player_id = %s AND course_id = %s
-            LIMIT 1;
+            WHERE course_id = %s;
         """
-        personal_record = db_helper.select(query, (player_id, course_id))[0][0]
+        personal_record, server_record = db_helper.select(query, (player_id, course_id))[0]
+
+        # Check for personal record
         personal_record_status = None
         if personal_record == None or score <= personal_record:
             personal_record_status = "New"
@@ -377,13 +518,6 @@ def verify_score(ctx, hash):
 
         if personal_record_status != None:
             # Check for server record
-            query = f"""
-                SELECT MIN(score) AS server_record
-                FROM {SCORES_TABLE}
-                WHERE course_id = %s
-                LIMIT 1;
-            """
-            server_record = db_helper.select(query, (course_id,))[0][0]
             server_record_status = None
             if server_record == None or score <= server_record:
                 server_record_status = "New"
@@ -395,50 +529,69 @@ def verify_score(ctx, hash):
         difficulty_index = difficulty_indices[course_id - 1]
         adjusted_score = float(score) - difficulty_index
 
-        # Insert score into database
+        # Insert the score into the database, remove it from the pending queue
+        # and get all adjusted scores for the given player, oldest first. The
+        # inserted score isn't visible to the rest of the statement, so it is
+        # added to the player's scores from the INSERT's returned row.
         insert_query = f"""
-            INSERT INTO {SCORES_TABLE} (timestamp, course_id, player_id, character, score, adjusted_score)
-            VALUES (%s, %s, %s, %s, %s, %s);
-        """
-        values = (timestamp, course_id, player_id, character, score, adjusted_score)
-        db_helper.insert_single(insert_query, values)
-
-        # Delete from pending queue
-        delete_query = f"""
-            DELETE FROM {PENDING_SCORES_TABLE}
-            WHERE hash = %s;
-        """
-        db_helper.delete(delete_query, (hash,))
-        
-        # Get all adjusted scores for the given player
-        select_query = f"""
-            SELECT adjusted_score
-            FROM {SCORES_TABLE}
-            WHERE player_id = %s
-            ORDER BY timestamp;
-        """
-        scores = [entry[0] for entry in db_helper.select(select_query, (player_id,))]
-
-        # Calculate new rating
-        new_rating = calculate_player_rating(scores)
-
-        # Update score entry with new rating
-        update_query = f"""
-            UPDATE {SCORES_TABLE}
-            SET rating = %s
-            WHERE player_id = %s AND timestamp = %s;
+            WITH inserted AS (
+                INSERT INTO {SCORES_TABLE} (timestamp, course_id, player_id, character, score, adjusted_score)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING round_id, timestamp, adjusted_score
+            ), deleted AS (
+                DELETE FROM {PENDING_SCORES_TABLE}
+                WHERE hash = %s
+            )
+            SELECT round_id, adjusted_score, is_inserted
+            FROM (
+                SELECT round_id, timestamp, adjusted_score, FALSE AS is_inserted
+                FROM {SCORES_TABLE}
+                WHERE player_id = %s
+                UNION ALL
+                SELECT round_id, timestamp, adjusted_score, TRUE AS is_inserted
+                FROM inserted
+            ) AS player_scores
+            ORDER BY timestamp, round_id;
         """
-        db_helper.update_single(update_query, (new_rating, player_id, timestamp))
+        values = (timestamp, course_id, player_id, character, score, adjusted_score, hash, player_id)
+        player_scores = db_helper.select(insert_query, values)
+        scores = [adjusted_score for _, adjusted_score, _ in player_scores]
+
+        round_id, _, is_newest = player_scores[-1]
+        if is_newest:
+            # Only the new score's rating has to be calculated
+            new_rating = calculate_player_rating(scores)
+            round_ids = [round_id]
+            round_ratings = [new_rating]
+        else:
+            # The round is older than some of the player's other scores, so
+            # the ratings of every score after it have changed too
+            round_ids = [round_id for round_id, _, _ in player_scores]
+            round_ratings = calculate_rating_history(scores)
+            new_rating = round_ratings[-1]
 
-        # Update ratings table
+        # Update score entries with new ratings and update ratings table
         ratings_insert_query = f"""
+            WITH rated AS (
+                UPDATE {SCORES_TABLE} s
+                SET rating = round.rating
+                FROM unnest(%s::bigint[], %s::float8[]) AS round(id, rating)
+                WHERE s.round_id = round.id
+            )
             INSERT INTO {PLAYERS_TABLE} (discord_id, player_name, rating)
             VALUES (%s, %s, %s)
             ON CONFLICT (discord_id)
             DO UPDATE SET
                 rating = excluded.rating;
         """
-        db_helper.insert_single(ratings_insert_query, (player_id, player_name, new_rating))
+        values = (round_ids, round_ratings, player_id, player_name, new_rating)
+        db_helper.insert_single(ratings_insert_query, values)
+
+        mark_ratings_changed()
+
+        # A player's first verified score adds them to the players table
+        if player_id not in _player_name_cache:
+            invalidate_player_name_cache()
         
         message = f"Successfully submitted round {hash}."
         if personal_record_status != None:
@@ -503,9 +656,6 @@ def calculate_player_rating(scores):
         float: The player's calculated rating based on their scores.
     """
 
-    MIN_REQUIRED_SCORES = 6
-    ROLLING_AVERAGE_WINDOW = 40
-
     if len(scores) < MIN_REQUIRED_SCORES:
         # Not enough scores for a rating, use default value
         return INVALID_RATING
@@ -518,6 +668,40 @@ def calculate_player_rating(scores):
         return sum(scores[-ROLLING_AVERAGE_WINDOW:]) / ROLLING_AVERAGE_WINDOW
 
 
+def calculate_rating_history(scores):
+    """
+    Calculates a player's rating after each of their rounds.
+
+    The rating after each round is calculated the same way as
+    calculate_player_rating, but keeps a running total and the most recent
+    scores instead of slicing the player's history for every round.
+
+    Parameters:
+        scores (list of float): A list of adjusted scores sorted from oldest to
+            newest.
+
+    Returns:
+        list of float: The player's rating after each round.
+    """
+
+    ratings = []
+    total_score = 0
+    recent_scores = deque(maxlen=ROLLING_AVERAGE_WINDOW)
+
+    for num_scores, score in enumerate(scores, start=1):
+        total_score += score
+        recent_scores.append(score)
+
+        if num_scores < MIN_REQUIRED_SCORES:
+            ratings.append(INVALID_RATING)
+        elif num_scores < ROLLING_AVERAGE_WINDOW:
+            ratings.append(total_score / num_scores)
+        else:
+            ratings.append(sum(recent_scores) / ROLLING_AVERAGE_WINDOW)
+
+    return ratings
+
+
 def update_adjusted_scores():
     """
     Update adjusted golf scores in the database.
@@ -531,27 +715,14 @@ def update_adjusted_scores():
         none
     """
 
-    # Retrieve round info for specified players and difficulty indices for all
-    # courses, formatted into lists
-    score_query = f"""
-        SELECT round_id, course_id, score, adjusted_score
-        FROM {SCORES_TABLE};
-    """
-    scores = [list(entry) for entry in db_helper.select(score_query)]
-
-    # Recalculate all adjusted scores
-    indices = get_difficulty_indices()
-    for entry in scores:
-        entry[3] = entry[2] - indices[entry[1] - 1]
-
-    # Update database with new adjusted scores
+    # Recalculate all adjusted scores from the courses' difficulty indices
     update_query = f"""
         UPDATE {SCORES_TABLE} s
-        SET adjusted_score = score.adj_score
-        FROM (VALUES %s) AS score(id, course_id, score, adj_score)
-        WHERE s.round_id = score.id;
+        SET adjusted_score = s.score - c.difficulty_index
+        FROM {COURSES_TABLE} c
+        WHERE s.course_id = c.course_id;
     """
-    db_helper.update_multiple(update_query, scores)
+    db_helper.update_single(update_query)
 
 
 def update_player_ratings():
@@ -560,8 +731,8 @@ def update_player_ratings():
 
     This function updates player ratings by calculating them based on the
     history of their adjusted scores. It retrieves score data from a database
-    table, sorts the data by timestamp, and then iteratively calculates player
-    ratings for each round of scores.
+    table, grouped by player and sorted by timestamp, and then iteratively
+    calculates player ratings for each round of scores.
 
     The updated ratings are then stored in the database, and the function also
     updates a table containing info for each player with the players' current
@@ -574,62 +745,52 @@ def update_player_ratings():
         none
     """
 
+    # Rows arrive grouped by player and sorted by timestamp, so each player's
+    # score history can be read off in a single pass
     select_query = f"""
-        SELECT round_id, player_id, timestamp, course_id, adjusted_score
+        SELECT player_id, round_id, adjusted_score
         FROM {SCORES_TABLE}
+        ORDER BY player_id, timestamp, round_id;
     """
-    player_score_data = db_helper.select(select_query)
-
-    # Dictionary to store player IDs and their corresponding score info
-    score_data_dict = {}
-
-    # Populate score data dictionary
-    for entry in player_score_data:
-        round_id, player_id, timestamp, course_id, adjusted_score = entry
+    player_score_data = db_helper.iter_select(select_query)
 
-        if player_id not in score_data_dict:
-            score_data_dict[player_id] = []
-
-        score_data_dict[player_id].append(
-            [round_id, timestamp, course_id, adjusted_score, 0.0])
-
-    player_index = 0
-    current_ratings = []
+    round_ids = []
+    round_ratings = []
+    player_ids = []
+    player_ratings = []
 
     # Calculate and update player ratings based on score history
-    for player_id in score_data_dict:
-        score_data_dict[player_id].sort(key=lambda x: x[1])  # Sort by timestamp
-        
-        for round_id in range(len(score_data_dict[player_id])):
-            adjusted_scores = [entry[3] for entry in score_data_dict[player_id][:round_id + 1]]
-            rating = calculate_player_rating(adjusted_scores)
-            score_data_dict[player_id][round_id][4] = rating
-
-        # Get the player's rating after their most recent score and add an entry for their current rating
-        current_rating = score_data_dict[player_id][-1][4]
-        current_ratings.append((player_id, current_rating))
-
-    # Flatten dictionary for database update
-    flattened_score_data = [score 
-                            for entry in score_data_dict.values() 
-                            for score in entry]
-
-    # Update database with new ratings
-    update_query = f"""
-        UPDATE {SCORES_TABLE} s
-        SET rating = round.rating
-        FROM (VALUES %s) AS round(id, timestamp, round_format, adj_score, rating)
-        WHERE s.round_id = round.id;
-    """
-    db_helper.update_multiple(update_query, flattened_score_data)
-    
+    for player_id, rounds in groupby(player_score_data, key=itemgetter(0)):
+        rounds = list(rounds)
+        ratings = calculate_rating_history([adjusted_score for _, _, adjusted_score in rounds])
+
+        round_ids.extend(round_id for _, round_id, _ in rounds)
+        round_ratings.extend(ratings)
+
+        # The player's current rating is their rating after their most recent score
+        player_ids.append(player_id)
+        player_ratings.append(ratings[-1])
+
+    # Update database with new ratings. The IDs and ratings are passed as
+    # arrays and joined with unnest, so all the rows are sent in one statement
+    # and one round trip. Both tables are updated in that same statement so the
+    # ratings in them never disagree. Players who are not in
+    # the players table yet are left out on purpose, since they don't have a
+    # display name to be shown in the rankings with.
     update_query = f"""
+        WITH round_ratings AS (
+            UPDATE {SCORES_TABLE} s
+            SET rating = round.rating
+            FROM unnest(%s::bigint[], %s::float8[]) AS round(id, rating)
+            WHERE s.round_id = round.id
+        )
         UPDATE {PLAYERS_TABLE} p
         SET rating = player.rating
-        FROM (VALUES %s) AS player(discord_id, rating)
+        FROM unnest(%s::bigint[], %s::float8[]) AS player(discord_id, rating)
         WHERE p.discord_id = player.discord_id;
     """
-    db_helper.update_multiple(update_query, current_ratings)
+    db_helper.update_single(update_query, (round_ids, round_ratings, player_ids, player_ratings))
+    mark_ratings_changed()
     
 
 def generate_rankings_table():
@@ -643,48 +804,51 @@ def generate_rankings_table():
         Exception: If there is an error during the database interaction.
     """
 
+    global _rankings_changed
+
     logger.info("Updating rankings...")
 
     now = datetime.utcnow()
     formatted_time = now.strftime("%m/%d/%Y %H:%M:%S")
 
-    # Recalculate all adjusted scores and player ratings to ensure correctness
-    update_adjusted_scores()
-    update_player_ratings()
+    # The player ratings are kept up to date when scores are verified, so they
+    # are read as they are. A full recalculation is only done when the
+    # difficulty indices change or when a moderator requests it.
+
+    # Only rewrite the rankings sheet if any ratings changed since it was last
+    # written. The flag is cleared before reading the ratings so that changes
+    # made while the sheet is being written are picked up next time.
+    if not _rankings_changed:
+        logger.info("No ratings changed since the last update.")
+        logger.info("Finished updating rankings.")
+        return
+
+    _rankings_changed = False
 
     try:
+        # Get the rated players, sorted and ranked by rating
         query = f"""
-            SELECT player_id, rating, player_name
-            FROM {PLAYERS_TABLE};
+            SELECT ROW_NUMBER() OVER (ORDER BY rating ASC) AS rank, player_name, rating
+            FROM {PLAYERS_TABLE}
+            WHERE rating <> %s
+            ORDER BY rating ASC;
         """
-        player_data = db_helper.select(query)
-    except Exception as e:
-        return print(f"Error: {e}")
-
-    # Separate players with no valid rating
-    rated_players = []
+        rankings_sheet = db_helper.select(query, (INVALID_RATING,))
 
-    for player_id, rating, player_name in player_data:
-        if rating != INVALID_RATING:
-            rated_players.append([player_name, rating])
+        if len(rankings_sheet) == 0:
+            logger.info("No players are currently rated.")
+            logger.info("Finished updating rankings.")
+            return
 
-    if len(rated_players) == 0:
-        logger.info("No players are currently rated.")
-        logger.info("Finished updating rankings.")
-        return
-    
-    # Sort players based on rating
-    rated_players.sort(key=lambda x: x[1])
-
-    # Assign ranks to rated players
-    rankings_sheet = [[rank, player_name, rating] 
-                      for rank, [player_name, rating] in enumerate(rated_players, start=1)]
-
-    last_updated_msg = f"Last updated: {formatted_time}"
-    sheets_helper.write_data(
-        LEADERBOARD_SPREADSHEET_ID, rankings_sheet, "Rankings", "A4")
-    sheets_helper.write_data(
-        LEADERBOARD_SPREADSHEET_ID, [[last_updated_msg]],  "Rankings", "A2")
+        last_updated_msg = f"Last updated: {formatted_time}"
+        sheets_helper.batch_write(LEADERBOARD_SPREADSHEET_ID, [
+            (rankings_sheet, "Rankings", "A4"),
+            ([[last_updated_msg]], "Rankings", "A2"),
+        ])
+    except Exception:
+        # Try writing the sheet again on the next update
+        _rankings_changed = True
+        raise
     
     logger.info("Finished updating rankings.")
 
@@ -714,6 +878,32 @@ def sync_spreadsheet_with_database(ctx):
         return ctx.respond(f"Error syncing spreadsheet: {e}")
 
 
+def recalculate_ratings(ctx):
+    """
+    Recalculate the adjusted scores and ratings of every player from scratch.
+
+    Parameters:
+        ctx: The context of the command.
+
+    Returns:
+        str: A response indicating the result of the recalculation.
+
+    Raises:
+        Exception: If an error occurred when recalculating the ratings.
+    """
+
+    moderator_role = utils.get_moderator_role(ctx)
+    if moderator_role not in ctx.author.roles:
+        return ctx.respond("You don't have permission to use this command.")
+
+    try:
+        update_adjusted_scores()
+        update_player_ratings()
+        return ctx.respond("Recalculated player ratings.")
+    except Exception as e:
+        return ctx.respond(f"Error recalculating player ratings: {e}")
+
+
 def check_row_valid(row):
     """
     Check the validity of a data row extracted from a spreadsheet.
@@ -725,21 +915,12 @@ def check_row_valid(row):
         bool: True if the row is valid, False otherwise.
     """
         
-    if len(row) < 5:
+    if len(row) < 5 or '' in row:
         return False
 
-    for element in row:
-        if element == '':
-            return False
-
     timestamp, course_id, player_id, character, score = row
-    if int(course_id) > 12 or int(course_id) < 1:
-        return False
-
-    if character not in CHARACTERS:
-        return False
 
-    return True
+    return 1 <= int(course_id) <= 12 and character in _CHARACTERS_SET
 
 
 def update_database_from_spreadsheet(ctx):
@@ -770,45 +951,48 @@ def update_database_from_spreadsheet(ctx):
         return ctx.respond("You don't have permission to use this command.")
 
     try:
-        data = sheets_helper.get(DB_SPREADSHEET_ID, "Scores!A2:E")
+        # Get the scores along with the player IDs and their display names from the sheet
+        data, players_data = sheets_helper.batch_get(DB_SPREADSHEET_ID, ["Scores!A2:E", "Players!A2:B"])
 
-        # Check that table has no missing/invalid values
-        for i in range(len(data)):
-            row = data[i]
-            if check_row_valid(row) is False:
-                # header row + 1
-                return ctx.respond(f"Error updating database: One or more elements missing/invalid at row {i + 2}.")
+        # Check that table has no missing/invalid values. Rows are numbered
+        # from 2 to account for the header row.
+        invalid_row = next((i for i, row in enumerate(data, start=2) if not check_row_valid(row)), None)
+        if invalid_row is not None:
+            return ctx.respond(f"Error updating database: One or more elements missing/invalid at row {invalid_row}.")
 
         # Delete rounds and players tables and reset the serials
         db_helper.delete(f"TRUNCATE TABLE {SCORES_TABLE}, {PLAYERS_TABLE} RESTART IDENTITY;")
 
-        # Insert the data from the spreadsheet into the scores table, using a dummy value for adjusted score
+        # Round IDs start over, so the next sync has to rewrite the spreadsheet
+        utils.reset_spreadsheet_sync()
+
+        # Copy the data from the spreadsheet into the scores table, using a dummy value for adjusted score
         insert_data = [(int(timestamp), int(course_id), int(player_id), character, int(score), 0.0) 
                        for [timestamp, course_id, player_id, character, score] in data]
-        insert_query = f"""
-            INSERT INTO {SCORES_TABLE} (timestamp, course_id, player_id, character, score, adjusted_score) 
-            VALUES %s;
-        """
-        db_helper.insert_multiple(insert_query, insert_data)
+        db_helper.copy_records(
+            SCORES_TABLE,
+            ["timestamp", "course_id", "player_id", "character", "score", "adjusted_score"],
+            insert_data)
 
         # Recalculate all adjusted scores and player ratings to ensure correctness
         update_adjusted_scores()
         update_player_ratings()
 
-        # Get the IDs currently in the players table
+        # Get every player's current rating, which is the rating of their latest score
         query = f"""
-            SELECT discord_id
-            FROM {PLAYERS_TABLE}
+            SELECT DISTINCT ON (player_id) player_id, rating
+            FROM {SCORES_TABLE}
+            ORDER BY player_id, timestamp DESC;
         """
-        current_player_ids = [elem[0] for elem in db_helper.select(query)]
-
-        # Get the player IDs and their display names from the sheet
-        data = sheets_helper.get(DB_SPREADSHEET_ID, "Players!A2:B")
+        current_ratings = dict(db_helper.select(query))
 
         unnamed_players = []
         no_score_players = []
 
-        for entry in data:
+        # Keyed by player ID, since an upsert can't touch the same row twice
+        players = {}
+
+        for entry in players_data:
             player_id = int(entry[0])
 
             if len(entry) == 1:
@@ -816,36 +1000,26 @@ def update_database_from_spreadsheet(ctx):
                 unnamed_players.append(player_id)
                 continue
 
-            # Get the newly entered player's current rating
-            query = f"""
-                SELECT rating
-                FROM {SCORES_TABLE}
-                WHERE (player_id, timestamp) IN (
-                    SELECT player_id, MAX(timestamp) AS latest_timestamp
-                    FROM {SCORES_TABLE}
-                    WHERE player_id = %s
-                    GROUP BY player_id
-                );
-            """
-            rating = db_helper.select(query, (player_id,))
-
-            if rating == []:
+            if player_id not in current_ratings:
                 no_score_players.append(player_id)
                 continue
 
-            rating = rating[0][0]
-            player_name = entry[1]
+            players[player_id] = (player_id, entry[1], current_ratings[player_id])
 
-            # Update the player table with the new player ID, their display name and their rating
+        # Update the player table with the new player IDs, their display names and their ratings
+        if players:
             ratings_insert_query = f"""
                 INSERT INTO {PLAYERS_TABLE} (discord_id, player_name, rating)
-                VALUES (%s, %s, %s)
+                VALUES %s
                 ON CONFLICT (discord_id)
                 DO UPDATE SET
                     rating = excluded.rating,
                     player_name = excluded.player_name;
             """
-            db_helper.insert_single(ratings_insert_query, (player_id, player_name, rating))
+            db_helper.insert_multiple(ratings_insert_query, list(players.values()))
+
+        invalidate_player_name_cache()
+        mark_ratings_changed()
 
         if (len(unnamed_players) != 0):
             return ctx.respond(f"Players {unnamed_players} in the Players sheet do not have names. Excluding them from the rankings table.")
@@ -857,41 +1031,178 @@ def update_database_from_spreadsheet(ctx):
         return ctx.respond(f"Error updating database: {e}")
     
 
-def get_top_10_table(ctx):
+def get_table_image(name, build_image):
+    """
+    Retrieve a pre-rendered table image, rendering it if it isn't cached.
 
-    try:
-        query = f"""
-            SELECT player_id, rating, player_name
-            FROM {PLAYERS_TABLE};
-        """
-        player_data = db_helper.select(query)
-    except Exception as e:
-        return print(f"Error: {e}")
+    Parameters:
+        name (str): The name of the table.
+        build_image (callable): Function that renders the table image.
+
+    Returns:
+        bytes or None: The cached table image.
+    """
+
+    # Read the version before rendering, so an image rendered from data that
+    # changes in the meantime is not used once the change is recorded
+    version = _table_image_versions.get(name, 0)
+    now = time.monotonic()
+    cached = _table_image_cache.get(name)
+
+    if cached is None or cached[2] != version or now - cached[1] >= TABLE_IMAGE_CACHE_TTL:
+        cached = (build_image(), now, version)
+        _table_image_cache[name] = cached
+
+    return cached[0]
+
+
+def invalidate_table_image(name):
+    """
+    Discard a pre-rendered table image so it is rendered again on next use.
+
+    Parameters:
+        name (str): The name of the table.
+
+    Returns:
+        none
+    """
+
+    _table_image_versions[name] = _table_image_versions.get(name, 0) + 1
+
+
+def get_player_table_image(command, player_id, build_image):
+    """
+    Retrieve a rendered table image for a player, rendering it if it isn't
+    cached or the player's scores changed since it was rendered.
+
+    Parameters:
+        command (str): The name of the command the table is for.
+        player_id (int): The ID of the player.
+        build_image (callable): Function that renders the table image.
 
-    # Separate players with no valid rating
-    rated_players = []
+    Returns:
+        bytes: The cached table image.
+    """
+
+    key = (command, player_id)
+
+    # Read the version before rendering, so an image rendered from data that
+    # changes in the meantime is not used once the change is recorded
+    version = _player_table_version
+    now = time.monotonic()
+    cached = _player_table_cache.get(key)
+
+    if cached is None or cached[2] != version or now - cached[1] >= PLAYER_TABLE_CACHE_TTL:
+        cached = (build_image(), now, version)
+        _player_table_cache[key] = cached
+
+    return cached[0]
+
+
+def invalidate_player_tables():
+    """
+    Stop using every cached player table image, so they are rendered again on
+    next use.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    global _player_table_version
+    _player_table_version += 1
+
+
+def mark_ratings_changed():
+    """
+    Record that player ratings have changed, so the top 10 and player tables
+    are rendered again and the rankings sheet is rewritten on its next update.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    global _rankings_changed
+    _rankings_changed = True
+    invalidate_table_image("top10")
+    invalidate_player_tables()
+
+
+def refresh_table_images():
+    """
+    Render the top 10 and difficulty indices tables ahead of time so the
+    commands posting them only have to send the cached images.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    for name, build_image in (("top10", build_top_10_image),
+                              ("difficulty_indices", build_difficulty_indices_image)):
+        version = _table_image_versions.get(name, 0)
+        now = time.monotonic()
+        _table_image_cache[name] = (build_image(), now, version)
+
+
+def build_top_10_image():
+    """
+    Render the table of the current top 10 players in the rankings.
+
+    Parameters:
+        none
+
+    Returns:
+        bytes or None: The table as a PNG image, or None if no players are
+            currently rated.
+
+    Raises:
+        Exception: If there is an error during the database interaction.
+    """
 
-    for player_id, rating, player_name in player_data:
-        if rating != INVALID_RATING:
-            rated_players.append([player_name, rating])
+    # Get the 10 best rated players, ranked by rating
+    query = f"""
+        SELECT ROW_NUMBER() OVER (ORDER BY rating ASC) AS rank, player_name, rating
+        FROM {PLAYERS_TABLE}
+        WHERE rating <> %s
+        ORDER BY rating ASC
+        LIMIT 10;
+    """
+    rated_players = db_helper.select(query, (INVALID_RATING,))
 
     if len(rated_players) == 0:
         logger.info("No players are currently rated.")
-        logger.info("Finished updating rankings.")
-        return ctx.respond("No players are currently ranked.")
-    
-    # Sort players based on rating
-    rated_players.sort(key=lambda x: x[1])
+        return None
 
-    # Assign ranks to rated players
     rankings_sheet = [[rank, player_name, f"{rating:.2f}"] 
-                      for rank, [player_name, rating] in enumerate(rated_players, start=1)]
+                      for rank, player_name, rating in rated_players]
     
-    # Use the top 10 entries of the rankings to create the table
-    top_10_table = table_generation.create_ascii_table("Server Rankings", ["Rank", "Player", "Rating"], rankings_sheet[:10])
+    top_10_table = table_generation.create_ascii_table("Server Rankings", ["Rank", "Player", "Rating"], rankings_sheet)
     table_stream = table_generation.create_image_from_table(str(top_10_table))
-    attachment = discord.File(fp=table_stream, filename="rankings.png")
+    image = table_stream.getvalue()
     table_stream.close()
+    return image
+
+
+def get_top_10_table(ctx):
+
+    try:
+        image = get_table_image("top10", build_top_10_image)
+    except Exception:
+        logger.exception("An error occured while generating the top 10 table.")
+        return ctx.respond("Failed to generate the rankings table.")
+
+    if image is None:
+        return ctx.respond("No players are currently ranked.")
+
+    attachment = discord.File(fp=io.BytesIO(image), filename="rankings.png")
     return ctx.respond(file=attachment)
 
 
@@ -903,9 +1214,10 @@ def generate_top_scores_table(ctx):
         FROM {SCORES_TABLE} s
         JOIN {COURSES_TABLE} c ON s.course_id = c.course_id
         JOIN {PLAYERS_TABLE} p ON s.player_id = p.discord_id
-        ORDER BY adjusted_score ASC, s.timestamp ASC;
+        ORDER BY adjusted_score ASC, s.timestamp ASC
+        LIMIT 50;
     """
-    scores = db_helper.select(query)[:50]
+    scores = db_helper.select(query)
 
     top_scores_table_data = []
     rank = 1
@@ -916,13 +1228,13 @@ def generate_top_scores_table(ctx):
         course_str = f"{course_name} ({nine})"
         if adjusted_score == prev_adjusted_score:
             prev_adjusted_score = adjusted_score
-            entry = [tied_rank, player_name, datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"), course_str, character, score, f"{difficulty_index:.2f}", f"{adjusted_score:.2f}"]
+            entry = [tied_rank, player_name, format_date(timestamp), course_str, character, score, f"{difficulty_index:.2f}", f"{adjusted_score:.2f}"]
             top_scores_table_data.append(entry)
             rank += 1
             continue
 
         prev_adjusted_score = adjusted_score
-        entry = [rank, player_name, datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"), course_str, character, score, f"{difficulty_index:.2f}", f"{adjusted_score:.2f}"]
+        entry = [rank, player_name, format_date(timestamp), course_str, character, score, f"{difficulty_index:.2f}", f"{adjusted_score:.2f}"]
         top_scores_table_data.append(entry)
         tied_rank = rank
         rank += 1
@@ -951,21 +1263,17 @@ def generate_server_records_table(ctx):
     """
     scores = db_helper.select(query)
 
-    table_data = []
+    # Group the records by course in a single pass over the rows
+    records_by_course = {}
 
-    for course in COURSES:
-        for nine in NINES:
-            records = [
-                [str(score), player_name, datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"), character]
-                for course_name, nine_, player_name, timestamp, character, score in scores
-                if course_name == course and nine_ == nine
-            ]
-
-            # Add placeholder if no record exists
-            if not records:
-                records = [["--", "--", "--", "--"]]
+    for course_name, nine, player_name, timestamp, character, score in scores:
+        records_by_course.setdefault((course_name, nine), []).append(
+            [str(score), player_name, format_date(timestamp), character])
 
-            table_data.append(records)
+    # Add placeholder if no record exists
+    table_data = [records_by_course.get((course, nine), [["--", "--", "--", "--"]])
+                  for course in COURSES
+                  for nine in NINES]
 
     # Organize data for final table
     final_data = []
@@ -1041,18 +1349,10 @@ def generate_personal_records_table(ctx, player_id):
     elif not player_id.isdigit():
         return ctx.respond("Player ID must be an integer.")
 
-    # Get the player's name from the database
-    query = f"""
-        SELECT player_name
-        FROM {PLAYERS_TABLE}
-        WHERE discord_id = %s
-    """
-    result = db_helper.select(query, (player_id,))
+    player_name = get_player_names().get(int(player_id))
 
-    if result == []:
+    if player_name is None:
         return ctx.respond("Player not found.")
-    
-    player_name = result[0][0]
 
     query = f"""
         SELECT c.course_name, c.nine, s.timestamp, s.character, s.score
@@ -1073,7 +1373,7 @@ def generate_personal_records_table(ctx, player_id):
     for course in COURSES:
         for nine in NINES:
             records = [
-                [str(score), datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d"), character]
+                [str(score), format_date(timestamp), character]
                 for course_name, nine_, timestamp, character, score in scores
                 if course_name == course and nine_ == nine
             ]
@@ -1151,7 +1451,16 @@ def generate_personal_records_table(ctx, player_id):
     return ctx.respond(file=attachment)
 
 
-def get_difficulty_indices_table(ctx):
+def build_difficulty_indices_image():
+    """
+    Render the table of the current difficulty indices for each course.
+
+    Parameters:
+        none
+
+    Returns:
+        bytes: The table as a PNG image.
+    """
 
     difficulty_indices = get_difficulty_indices()
     difficulty_indices_data = []
@@ -1162,11 +1471,18 @@ def get_difficulty_indices_table(ctx):
         back_9_index = difficulty_indices[course_id * 2 + 1]
         difficulty_indices_data.append([course, f"{front_9_index:.2f}", f"{back_9_index:.2f}"])
     
-    # Create and post the difficulty indices table from the data
+    # Create the difficulty indices table from the data
     difficulty_indices_table = table_generation.create_ascii_table("Course Difficulty Indices", ["Course", "Front 9", "Back 9"], difficulty_indices_data)
     table_stream = table_generation.create_image_from_table(str(difficulty_indices_table))
-    attachment = discord.File(fp=table_stream, filename="indices.png")
+    image = table_stream.getvalue()
     table_stream.close()
+    return image
+
+
+def get_difficulty_indices_table(ctx):
+
+    image = get_table_image("difficulty_indices", build_difficulty_indices_image)
+    attachment = discord.File(fp=io.BytesIO(image), filename="indices.png")
     return ctx.respond(file=attachment)
 
 
@@ -1192,47 +1508,44 @@ def get_player_profile(ctx, player_id):
     
     player_name, player_rating = result[0]
 
-    # Retrieve the player's scores
+    # Retrieve the player's average score on each course and the number of
+    # times they played each character. Characters are ordered by when they
+    # were last played, so ties in usage go to the most recently played one.
     query = f"""
-        SELECT course_id, character, score
+        SELECT GROUPING(course_id) = 0 AS is_course, course_id, character, AVG(score)::float, COUNT(*)
         FROM {SCORES_TABLE}
         WHERE player_id = %s
-        ORDER BY timestamp DESC;
+        GROUP BY GROUPING SETS ((course_id), (character))
+        ORDER BY MAX(timestamp) DESC;
     """
     result = db_helper.select(query, (player_id,))
 
-    character_stats = defaultdict(int)
-    scores_dict = {}
-    total_scores = len(result)
+    character_stats = Counter()
+    average_scores = {}
 
-    for course_id, character, score in result:
-        character_stats[character] += 1
-        
-        if course_id in scores_dict:
-            scores_dict[course_id].append(score)
+    for is_course, course_id, character, average, count in result:
+        if is_course:
+            average_scores[course_id] = average
         else:
-            scores_dict[course_id] = [score]
+            character_stats[character] = count
 
-    # Calculate and save character usage percentages
-    character_percentages = {char: (count / total_scores) * 100 for char, count in character_stats.items()}
+    total_scores = sum(character_stats.values())
 
     # Find the top 3 most used characters
-    top_characters = dict(sorted(character_percentages.items(), key=lambda item: item[1], reverse=True)[:3])
+    top_characters = character_stats.most_common(3)
 
-    # Generate a formatted list
+    # Generate a formatted list with each character's usage percentage
     top_characters_list = [
-        f"   {i + 1}. {char} ({percentage:.2f}%)"
-        for i, (char, percentage) in enumerate(top_characters.items())
+        f"   {i + 1}. {char} ({(count / total_scores) * 100:.2f}%)"
+        for i, (char, count) in enumerate(top_characters)
     ]
 
     # Join the list into a string
     top_characters_str = "\n".join(top_characters_list)
 
-    # Calculate average score for each course
+    # Format the average score for each course
     average_dict = {}
-    for course_id, scores in scores_dict.items():
-        average = sum(scores) / len(scores)
-
+    for course_id, average in average_scores.items():
         # Make it so it always shows the sign for the score
         average_str = f"{average:.2f}"
         if average == 0.0:
@@ -1276,51 +1589,38 @@ def get_player_profile(ctx, player_id):
     return ctx.respond(file=attachment)
 
 
-def get_recent_score_table(ctx, player_id):
+def build_recent_scores_image(player_id, player_name):
+    """
+    Render the table of a player's 40 most recent scores.
 
-    if player_id is not None and player_id.isdigit() == False:
-        return ctx.respond("Player ID must be an integer.")
+    Parameters:
+        player_id (int): The ID of the player.
+        player_name (str): The display name of the player.
 
-    if player_id == None:
-        # If no ID was entered, get the poster's recent scores
-        player_id = ctx.author.id
+    Returns:
+        bytes: The rendered table image.
 
-    # Get the player's name and rating from the database
-    query = f"""
-        SELECT player_name
-        FROM {PLAYERS_TABLE}
-        WHERE discord_id = %s
+    Raises:
+        Exception: If there is an error during the database interaction.
     """
-    result = db_helper.select(query, (player_id,))
-
-    if result == []:
-        return ctx.respond("Player not found.")
-    
-    player_name = result[0][0]
 
-    # Retrieve the player's scores
+    # Retrieve the player's 40 most recent scores
     query = f"""
         SELECT s.timestamp, s.course_id, s.character, s.score, c.difficulty_index, s.adjusted_score, s.rating
         FROM {SCORES_TABLE} s
         JOIN {COURSES_TABLE} c ON s.course_id = c.course_id
-        WHERE player_id = %s;
+        WHERE player_id = %s
+        ORDER BY s.timestamp DESC
+        LIMIT 40;
     """
-    result = [list(entry) for entry in db_helper.select(query, (player_id,))]
-    result = sorted(result, key=lambda x: x[0], reverse=True)  # Sort by timestamp in descending order (most recent scores first)
+    result = db_helper.select(query, (player_id,))
 
     recent_scores_table_data = []
 
-    # Get the most recent 40 scores
-    for timestamp, course_id, character, score, difficulty_index, adjusted_score, rating in result[:40]:
-        formatted_date = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
-        nine = NINES[(course_id - 1) % 2]
-        course = COURSES[math.ceil(course_id / len(NINES)) - 1]
-
-        score_str = str(score)
-        if score == 0:
-            score_str = f"±{score_str}"
-        elif score > 0:
-            score_str = f"+{score_str}"
+    for timestamp, course_id, character, score, difficulty_index, adjusted_score, rating in result:
+        formatted_date = format_date(timestamp)
+        course, nine = COURSE_NINE[course_id]
+        score_str = format_score(score)
 
         rating_str = f"{rating:.2f}" if rating != INVALID_RATING else "NR"
 
@@ -1330,97 +1630,81 @@ def get_recent_score_table(ctx, player_id):
     
     recent_scores_table = table_generation.create_ascii_table(f"Recent Scores ({player_name})", ["Date", "Course", "Character", "Score", "Diff.Ind.", "Adj.Score", "Rating"], recent_scores_table_data)
     table_stream = table_generation.create_image_from_table(str(recent_scores_table))
-    attachment = discord.File(fp=table_stream, filename="table.png")
+    image = table_stream.getvalue()
     table_stream.close()
-    return ctx.respond(file=attachment)
+    return image
 
 
-def update_difficulty_indices():
+def get_recent_score_table(ctx, player_id):
 
-    # Number of scores for each course to be considered for average calculation
-    NUM_REQUIRED_SCORES = 8
+    if player_id is not None and player_id.isdigit() == False:
+        return ctx.respond("Player ID must be an integer.")
 
-    # Get the score info for all players who have played each course more than
-    # the minimum number of times required
-    query = f"""
-        SELECT s.player_id, s.course_id, s.timestamp, s.score
-        FROM {SCORES_TABLE} s
-        WHERE s.player_id IN (
-        SELECT p.discord_id
-        FROM {PLAYERS_TABLE} p
-        WHERE (
-            SELECT COUNT(DISTINCT c.course_id)
-            FROM {COURSES_TABLE} c
-            WHERE (
-            SELECT COUNT(s.course_id)
-            FROM {SCORES_TABLE}  s
-            WHERE s.player_id = p.discord_id
-            AND s.course_id = c.course_id
-            ) >= {NUM_REQUIRED_SCORES}
-        ) = (SELECT COUNT(*) FROM {COURSES_TABLE})
-        );
-    """
-    scores = [list(entry) for entry in db_helper.select(query)]
-
-    # Create a dictionary to store player data.
-    player_data = defaultdict(list)
-    
-    # Sort the data by timestamp
-    scores.sort(key=lambda x: x[2])
-    
-    for player_id, course_id, date, score in scores:
-        player_data[player_id].append((course_id, date, score))
+    if player_id == None:
+        # If no ID was entered, get the poster's recent scores
+        player_id = ctx.author.id
 
-    player_course_averages = {}
-    
-    for player_id, rounds in player_data.items():
-        course_averages = defaultdict(list)
-        
-        for course_id, date, score in rounds:
-            course_averages[course_id].append(score)
-        
-        player_course_averages[player_id] = {}
-        
-        for course_id, scores in course_averages.items():
-            recent_scores = scores[-NUM_REQUIRED_SCORES:]
-            average_score = sum(recent_scores) / len(recent_scores)
-            player_course_averages[player_id][course_id] = average_score
-    
-    # Calculate the average of average scores for each player for each course.
-    course_averages_by_player = defaultdict(lambda: defaultdict(list))
-    
-    for player_id, course_averages in player_course_averages.items():
-        for course_id, average_score in course_averages.items():
-            course_averages_by_player[course_id][player_id] = average_score
-    
-    final_averages = {}
-    
-    for course_id, player_averages in course_averages_by_player.items():
-        average = sum(player_averages.values()) / len(player_averages)
-        final_averages[course_id] = average
+    player_id = int(player_id)
+    player_name = get_player_names().get(player_id)
 
-    difficulty_indices = {}
+    if player_name is None:
+        return ctx.respond("Player not found.")
 
-    # Calculate the overall average of course averages
-    overall_avg = sum(final_averages.values()) / len(final_averages)
+    image = get_player_table_image(
+        "recent_scores", player_id, lambda: build_recent_scores_image(player_id, player_name))
+    attachment = discord.File(fp=io.BytesIO(image), filename="table.png")
+    return ctx.respond(file=attachment)
 
-    difficulty_indices = {}
 
-    for course, course_avg in final_averages.items():
-        # Calculate the difficulty index for each course
-        difficulty_indices[course] = course_avg - overall_avg
+def update_difficulty_indices():
 
-    # Flatten the dictionary into a list
-    flattened_indices = [(course, difficulty_index) for course, difficulty_index in difficulty_indices.items()]
+    # Number of scores for each course to be considered for average calculation
+    NUM_REQUIRED_SCORES = 8
 
-    # Update database with new indices
+    # Calculate the difficulty index of each course in the database. Only
+    # players who have played each course at least the minimum number of times
+    # required are considered. Each player's average over their most recent
+    # scores on a course is averaged across players, and the difficulty index
+    # is how far that average is from the average of all courses.
     update_query = f"""
+        WITH qualified_courses AS (
+            SELECT player_id
+            FROM {SCORES_TABLE}
+            WHERE player_id IN (SELECT discord_id FROM {PLAYERS_TABLE})
+            GROUP BY player_id, course_id
+            HAVING COUNT(*) >= {NUM_REQUIRED_SCORES}
+        ),
+        qualifying_players AS (
+            SELECT player_id
+            FROM qualified_courses
+            GROUP BY player_id
+            HAVING COUNT(*) = (SELECT COUNT(*) FROM {COURSES_TABLE})
+        ),
+        recent_scores AS (
+            SELECT s.player_id, s.course_id, s.score,
+                   ROW_NUMBER() OVER (PARTITION BY s.player_id, s.course_id ORDER BY s.timestamp DESC) AS rn
+            FROM {SCORES_TABLE} s
+            WHERE s.player_id IN (SELECT player_id FROM qualifying_players)
+        ),
+        player_course_averages AS (
+            SELECT player_id, course_id, AVG(score) AS average_score
+            FROM recent_scores
+            WHERE rn <= {NUM_REQUIRED_SCORES}
+            GROUP BY player_id, course_id
+        ),
+        course_averages AS (
+            SELECT course_id, AVG(average_score) AS course_avg
+            FROM player_course_averages
+            GROUP BY course_id
+        )
         UPDATE {COURSES_TABLE} c
-        SET difficulty_index = v.index
-        FROM (VALUES %s) AS v(id, index)
-        WHERE c.course_id = v.id;
+        SET difficulty_index = v.course_avg - (SELECT AVG(course_avg) FROM course_averages)
+        FROM course_averages v
+        WHERE c.course_id = v.course_id;
     """
-    db_helper.update_multiple(update_query, flattened_indices)
+    db_helper.update_single(update_query)
+    invalidate_difficulty_index_cache()
+    invalidate_table_image("difficulty_indices")
 
 
 def generate_difficulty_indices_sheet():
@@ -1445,21 +1729,15 @@ def generate_difficulty_indices_sheet():
         """
         result = db_helper.select(query)
 
-        indices_table = [[] for _ in range(len(COURSES))]
-
-        for course_index in range(len(COURSES)):
-            front_index = result[(course_index * 2)][0]
-            back_index = result[(course_index * 2) + 1][0]
-            row = [front_index, back_index]
-            indices_table[course_index] = row
-
-        sheets_helper.write_data(
-            LEADERBOARD_SPREADSHEET_ID, indices_table, "Difficulty Indices", "B4")
+        # Pair up the front and back nine of each course
+        indices_table = [[front[0], back[0]] for front, back in zip(result[0::2], result[1::2])]
 
         now = datetime.utcnow()
         formatted_time = now.strftime("%m/%d/%Y %H:%M:%S")
         last_updated_msg = f"Last updated: {formatted_time}"
-        sheets_helper.write_data(
-            LEADERBOARD_SPREADSHEET_ID, [[last_updated_msg]], "Difficulty Indices", "A2")
+        sheets_helper.batch_write(LEADERBOARD_SPREADSHEET_ID, [
+            (indices_table, "Difficulty Indices", "B4"),
+            ([[last_updated_msg]], "Difficulty Indices", "A2"),
+        ])
     except Exception:
         raise
@@ -1,9 +1,14 @@
 from dotenv import load_dotenv
 import psycopg2
-from psycopg2 import extras
+from psycopg2 import extras, pool
 
+from contextlib import contextmanager
+import csv
+import io
 import logging
 import os
+import threading
+import time
 
 # Get logger for current module
 logger = logging.getLogger(__name__)
@@ -18,7 +23,82 @@ db_params = {
     "user": os.getenv("DB_USER"),
     "password": os.getenv("DB_PASSWORD")
 }
-connection = psycopg2.connect(**db_params)
+MAX_CONNECTIONS = 10
+
+# The pool closes any connection returned while it already holds minconn idle
+# connections, so minconn is set to the maximum to keep every connection open
+# for reuse
+connection_pool = pool.ThreadedConnectionPool(minconn=MAX_CONNECTIONS, maxconn=MAX_CONNECTIONS, **db_params)
+
+# Number of rows sent to the server per statement by insert_multiple and
+# update_multiple. psycopg2 defaults to 100, which takes a round trip for every
+# 100 rows.
+PAGE_SIZE = 1000
+
+# Connections that sat in the pool for longer than this many seconds are
+# checked before they are handed out, since the server may have dropped them
+# while they were idle
+IDLE_CHECK_INTERVAL = 60
+
+# Time each pooled connection was last returned to the pool, keyed by id()
+connection_returned_ts = {}
+
+# The pool raises an error instead of waiting when all of its connections are
+# in use, so threads wait for a free slot before borrowing a connection
+connection_slots = threading.BoundedSemaphore(MAX_CONNECTIONS)
+
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a connection from the connection pool.
+
+    The connection is returned to the pool once the block exits, so commands
+    and tasks running in different threads never share a connection. A
+    connection that has been idle for a while is checked first, and replaced
+    with a new one if the server dropped it.
+
+    Yields:
+        connection: A database connection.
+    """
+
+    with connection_slots:
+        connection = connection_pool.getconn()
+
+        returned_ts = connection_returned_ts.pop(id(connection), None)
+        if (returned_ts is not None
+                and time.monotonic() - returned_ts >= IDLE_CHECK_INTERVAL
+                and not is_connection_alive(connection)):
+            logger.warning("Discarding a database connection dropped by the server.")
+            connection_pool.putconn(connection, close=True)
+            connection = connection_pool.getconn()
+
+        try:
+            yield connection
+        finally:
+            if not connection.closed:
+                connection_returned_ts[id(connection)] = time.monotonic()
+            connection_pool.putconn(connection)
+
+
+def is_connection_alive(connection):
+    """
+    Check that a connection can still reach the server.
+
+    Parameters:
+        connection: A database connection.
+
+    Returns:
+        bool: True if the connection works, False otherwise.
+    """
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.rollback()
+        return True
+    except psycopg2.Error:
+        return False
 
 
 def select(query, values=None):
@@ -39,27 +119,63 @@ def select(query, values=None):
 
     results = None
 
-    try:
-        cursor = connection.cursor()
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
+
+            if values is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query, values)
+
+            # Check if query is a SELECT query
+            if cursor.description:
+                results = cursor.fetchall()
+
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+    return results
 
-        if values is None:
-            cursor.execute(query)
-        else:
-            cursor.execute(query, values)
 
-        # Check if query is a SELECT query
-        if cursor.description:
-            results = cursor.fetchall()
+def iter_select(query, values=None, itersize=2000):
+    """
+    Execute a SELECT query on the database and iterate over the results.
 
-        connection.commit()
-    except (Exception, psycopg2.Error) as error:
-        logger.error(error)
-        connection.rollback()
-        raise
-    finally:
-        if cursor:
+    The rows are read through a server-side cursor in batches of itersize
+    rows, so large result sets are never loaded into memory all at once.
+
+    Parameters:
+        query (str): The query to be executed.
+        values (tuple): The values to be used for the query (optional).
+        itersize (int): The number of rows to fetch from the server at a time.
+
+    Yields:
+        tuple: The next row of the results.
+
+    Raises:
+        Exception: If there is an error during the database interaction.
+    """
+
+    with get_connection() as connection:
+        cursor = connection.cursor(name="iter_select")
+        cursor.itersize = itersize
+
+        try:
+            cursor.execute(query, values)
+            yield from cursor
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            raise
+        finally:
             cursor.close()
-    return results
+            # End the transaction the cursor was opened in
+            connection.rollback()
 
 
 def insert_single(query, values):
@@ -74,42 +190,82 @@ def insert_single(query, values):
         Exception: If there is an error during the database interaction.
     """
 
-    try:
-        cursor = connection.cursor()
-        cursor.execute(query, values)
-        connection.commit()
-    except (Exception, psycopg2.Error) as error:
-        logger.error(error)
-        connection.rollback()
-        raise
-    finally:
-        if cursor:
-            cursor.close()
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
+            cursor.execute(query, values)
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
 
 
-def insert_multiple(query, values):
+def insert_multiple(query, values, page_size=PAGE_SIZE):
     """
     Execute a multi-row INSERT query with the provided values.
 
     Parameters:
         query (str): The query to be executed.
         values (list of tuples): List of tuples containing values for multiple rows.
+        page_size (int): The number of rows sent to the server per statement.
 
     Raises:
         Exception: If there is an error during the database interaction.
     """
 
-    try:
-        cursor = connection.cursor()
-        extras.execute_values(cursor, query, values)
-        connection.commit()
-    except (Exception, psycopg2.Error) as error:
-        logger.error(error)
-        connection.rollback()
-        raise
-    finally:
-        if cursor:
-            cursor.close()
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
+            extras.execute_values(cursor, query, values, page_size=page_size)
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+
+def copy_records(table, columns, records):
+    """
+    Bulk load rows into a table using COPY.
+
+    COPY is much faster than INSERT for loading thousands of rows at once. The
+    rows are written to an in-memory CSV buffer and streamed to the server in
+    a single command.
+
+    Parameters:
+        table (str): The name of the table to load the rows into.
+        columns (list of str): The columns the values of each row belong to.
+        records (iterable of tuples): The rows to be loaded into the table.
+
+    Raises:
+        Exception: If there is an error during the database interaction.
+    """
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(records)
+    buffer.seek(0)
+
+    query = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
+            cursor.copy_expert(query, buffer)
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
 
 
 def delete(query, values=None):
@@ -124,69 +280,78 @@ def delete(query, values=None):
         Exception: If there is an error during the database interaction.
     """
 
-    try:
-        cursor = connection.cursor()
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
 
-        if values is None:
-            cursor.execute(query)
-        else:
-            cursor.execute(query, values)
+            if values is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query, values)
 
-        connection.commit()
-    except (Exception, psycopg2.Error) as error:
-        logger.error(error)
-        connection.rollback()
-        raise
-    finally:
-        if cursor:
-            cursor.close()
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
 
 
-def update_single(query, values):
+def update_single(query, values=None):
     """
-    Execute a multi-row UPDATE query with the provided values.
+    Execute a single UPDATE query with the provided values.
 
     Parameters:
         query (str): The query to be executed.
-        values (list): List of lists containing the data to be updated.
+        values (tuple): The values to be used for the query (optional).
 
     Raises:
         Exception: If there is an error during the database interaction.
     """
 
-    try:
-        cursor = connection.cursor()
-        cursor.execute(query, values)
-        connection.commit()
-    except (Exception, psycopg2.Error) as error:
-        logger.error(error)
-        connection.rollback()
-        raise
-    finally:
-        if cursor:
-            cursor.close()
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
+
+            if values is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query, values)
 
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
 
-def update_multiple(query, values):
+
+def update_multiple(query, values, page_size=PAGE_SIZE):
     """
     Execute a multi-row UPDATE query with the provided values.
 
     Parameters:
         query (str): The query to be executed.
         values (list): List of lists containing the data to be updated.
+        page_size (int): The number of rows sent to the server per statement.
 
     Raises:
         Exception: If there is an error during the database interaction.
     """
 
-    try:
-        cursor = connection.cursor()
-        extras.execute_values(cursor, query, values)
-        connection.commit()
-    except (Exception, psycopg2.Error) as error:
-        logger.error(error)
-        connection.rollback()
-        raise
-    finally:
-        if cursor:
-            cursor.close()
+    with get_connection() as connection:
+        try:
+            cursor = connection.cursor()
+            extras.execute_values(cursor, query, values, page_size=page_size)
+            connection.commit()
+        except (Exception, psycopg2.Error) as error:
+            logger.error(error)
+            connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
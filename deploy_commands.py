@@ -0,0 +1,31 @@
+"""
+deploy_commands.py
+
+This script registers the bot's slash commands with Discord. The bot doesn't
+sync its commands when it starts, so run this script whenever a command is
+added, removed or changed.
+"""
+
+from bot import bot, TOKEN
+
+
+@bot.event
+async def on_connect():
+    """
+    Event that registers the slash commands with Discord once the bot has
+    connected, then shuts the bot down.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    await bot.sync_commands()
+    print("Registered slash commands.")
+    await bot.close()
+
+
+if __name__ == "__main__":
+    bot.run(TOKEN)
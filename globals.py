@@ -1,9 +1,9 @@
-COURSES = ["Toad Highlands", "Koopa Park", "Shy Guy Desert",
-           "Yoshi's Island", "Boo Valley", "Mario's Star"]
-NINES = ["Front 9", "Back 9"]
-CHARACTERS = ["Plum", "Charlie", "Peach", "Baby Mario", "Luigi", "Yoshi", "Sonny",
+COURSES = ("Toad Highlands", "Koopa Park", "Shy Guy Desert",
+           "Yoshi's Island", "Boo Valley", "Mario's Star")
+NINES = ("Front 9", "Back 9")
+CHARACTERS = ("Plum", "Charlie", "Peach", "Baby Mario", "Luigi", "Yoshi", "Sonny",
               "Wario", "Harry", "Mario", "Maple", "DK", "Bowser", "Metal Mario",
-              "Kid", "Joe", "Sherry", "Azalea"]
+              "Kid", "Joe", "Sherry", "Azalea")
 
 COURSES_TABLE = "courses"
 SCORES_TABLE = "scores"
@@ -8,22 +8,23 @@ from logging.handlers import TimedRotatingFileHandler
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
 # Create a handler for log file
 handler = TimedRotatingFileHandler("private/logs/bot_logs.log", when="midnight", interval=1, backupCount=30)
-handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+handler.setFormatter(formatter)
 logger.addHandler(handler)
 
-# Capture sys.stderr and write to both the terminal and the log file
-class TerminalAndLogFile:
-    def __init__(self, *file_objects):
-        self.file_objects = file_objects
+# Create a handler for the terminal
+stderr_handler = logging.StreamHandler(sys.stderr)
+stderr_handler.setFormatter(formatter)
+logger.addHandler(stderr_handler)
 
-    def write(self, message):
-        for file_obj in self.file_objects:
-            file_obj.write(message)
-            file_obj.flush()  # Flush the buffer to ensure immediate writing
+# Log uncaught exceptions so they end up in the log file as well
+def log_uncaught_exception(exc_type, exc_value, exc_traceback):
+    logger.critical("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
 
-sys.stderr = TerminalAndLogFile(sys.stderr, handler.stream)  # Redirect stderr to log file
+sys.excepthook = log_uncaught_exception
 
 if __name__ == "__main__":
     run_bot()
@@ -2,15 +2,18 @@
 sheets_helper.py
 
 This module provides functions to perform various operations with Google Sheets,
-such as writing data, retrieving data, and clearing data.
+such as writing data, appending data, retrieving data, and clearing data.
 """
 
 from dotenv import load_dotenv
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+from functools import lru_cache
 import logging
 import os
+import re
+import threading
 
 # Get logger for current module
 logger = logging.getLogger(__name__)
@@ -24,26 +27,108 @@ DB_SPREADSHEET_ID = os.getenv("DB_SPREADSHEET_ID")
 
 scopes = ["https://www.googleapis.com/auth/spreadsheets"]
 
+# A cell in A1 notation, split into its column letters and row number
+CELL_PATTERN = re.compile(r"([A-Z]+)(\d+)")
+
 # Load service account credentials from JSON key file
 credentials = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_KEY_PATH, scopes=scopes)
 
-# Create a service client
-service = build("sheets", "v4", credentials=credentials)
+# Service clients are kept per thread. The underlying httplib2 connection isn't
+# thread-safe, but reusing it within a thread keeps the connection to Google
+# alive between requests.
+thread_data = threading.local()
+
+
+def get_service():
+    """
+    Get the Sheets API service client for the current thread, creating it on
+    first use.
+
+    Returns:
+        Resource: The Sheets API service client.
+    """
+
+    if not hasattr(thread_data, "service"):
+        thread_data.service = build("sheets", "v4", credentials=credentials)
+    return thread_data.service
 
 
 def calculate_range(starting_cell, values):
 
-    start_col, start_row = starting_cell[0], int(starting_cell[1:])
-    end_col = chr(ord(start_col) + len(values[0]) - 1)
-    end_row = start_row + len(values) - 1
+    return _calculate_range(starting_cell, len(values), len(values[0]))
+
+
+@lru_cache(maxsize=256)
+def _calculate_range(starting_cell, num_rows, num_cols):
+
+    start_col, start_row = CELL_PATTERN.fullmatch(starting_cell).groups()
+    end_col = _num_to_col(_col_to_num(start_col) + num_cols - 1)
+    end_row = int(start_row) + num_rows - 1
     return f"{starting_cell}:{end_col}{end_row}"
 
 
+def _col_to_num(col):
+    """
+    Convert a column letter (A, B, ..., Z, AA, ...) to its 1-based number.
+    """
+
+    num = 0
+    for char in col:
+        num = num * 26 + (ord(char) - ord("A") + 1)
+    return num
+
+
+def _num_to_col(num):
+    """
+    Convert a 1-based column number to its column letter (A, B, ..., Z, AA, ...).
+    """
+
+    col = ""
+    while num:
+        num, remainder = divmod(num - 1, 26)
+        col = chr(ord("A") + remainder) + col
+    return col
+
+
 def write_data(SPREADSHEET_ID, values, sheet_name, starting_cell):
 
     range_name = calculate_range(starting_cell, values)
     body = {"values": values}
-    service.spreadsheets().values().update(
+    get_service().spreadsheets().values().update(
+        spreadsheetId=SPREADSHEET_ID,
+        range=f"{sheet_name}!{range_name}",
+        valueInputOption="RAW",
+        body=body
+    ).execute()
+
+
+def batch_write(SPREADSHEET_ID, data):
+    """
+    Write several blocks of values to a spreadsheet in a single request.
+
+    Parameters:
+        SPREADSHEET_ID (str): The ID of the spreadsheet.
+        data (list of tuples): (values, sheet_name, starting_cell) for each
+            block of values to be written.
+    """
+
+    body = {
+        "valueInputOption": "RAW",
+        "data": [
+            {"range": f"{sheet_name}!{calculate_range(starting_cell, values)}", "values": values}
+            for values, sheet_name, starting_cell in data
+        ]
+    }
+    get_service().spreadsheets().values().batchUpdate(
+        spreadsheetId=SPREADSHEET_ID,
+        body=body
+    ).execute()
+
+
+def append_data(SPREADSHEET_ID, values, sheet_name, range_name):
+
+    body = {"values": values}
+    get_service().spreadsheets().values().append(
         spreadsheetId=SPREADSHEET_ID,
         range=f"{sheet_name}!{range_name}",
         valueInputOption="RAW",
@@ -52,7 +137,7 @@ def write_data(SPREADSHEET_ID, values, sheet_name, starting_cell):
 
 
 def get(SPREADSHEET_ID, range_name):
-    result = service.spreadsheets().values().get(
+    result = get_service().spreadsheets().values().get(
         spreadsheetId=SPREADSHEET_ID,
         range=range_name
     ).execute()
@@ -60,9 +145,43 @@ def get(SPREADSHEET_ID, range_name):
     return values
 
 
+def batch_get(SPREADSHEET_ID, range_names):
+    """
+    Retrieve the values of several ranges of a spreadsheet in a single request.
+
+    Parameters:
+        SPREADSHEET_ID (str): The ID of the spreadsheet.
+        range_names (list of str): The ranges to be retrieved.
+
+    Returns:
+        list: The values of each range, in the same order as range_names.
+    """
+
+    result = get_service().spreadsheets().values().batchGet(
+        spreadsheetId=SPREADSHEET_ID,
+        ranges=range_names
+    ).execute()
+    return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+
+
 def clear(SPREADSHEET_ID, sheet_name, range_name):
 
-    service.spreadsheets().values().clear(
+    get_service().spreadsheets().values().clear(
         spreadsheetId=SPREADSHEET_ID,
         range=f"{sheet_name}!{range_name}"
     ).execute()
+
+
+def batch_clear(SPREADSHEET_ID, range_names):
+    """
+    Clear several ranges of a spreadsheet in a single request.
+
+    Parameters:
+        SPREADSHEET_ID (str): The ID of the spreadsheet.
+        range_names (list of str): The ranges to be cleared.
+    """
+
+    get_service().spreadsheets().values().batchClear(
+        spreadsheetId=SPREADSHEET_ID,
+        body={"ranges": range_names}
+    ).execute()
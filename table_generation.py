@@ -1,33 +1,77 @@
 from PIL import Image, ImageDraw, ImageFont
-from prettytable import PrettyTable
 
 import io
+import math
+
+# Font used to draw the tables, loaded once since parsing the font file is slow
+FONT = ImageFont.truetype("Inconsolata/static/Inconsolata-Medium.ttf", 20)
+
+# Size of the rendered text of each ASCII table shape, keyed on the length of
+# the longest line and the number of lines. The font is monospaced, so ASCII
+# tables of the same shape take up the same space. Other characters, such as
+# player names in other scripts or with emoji, can be missing from the font or
+# have a different width, so text containing them is measured every time.
+_text_size_cache = {}
 
 def create_ascii_table(title, field_names, data):
 
-    table = PrettyTable()
-    table.title = title
-    table.field_names = field_names
-    for row in data:
-        table.add_row(row)
+    rows = [[str(value) for value in row] for row in data]
+
+    # Each column is as wide as its longest value, including the field name
+    widths = [max(map(len, column)) for column in zip(field_names, *rows)]
+
+    # The title is followed by a space of padding like the cells. If the table
+    # is narrower than the title and its borders, every column is grown in
+    # proportion to fit it, rounding up.
+    title = f"{title} "
+    title_width = len(title) + 2
+    table_width = 2 + sum(width + 1 for width in widths)
+    if table_width < title_width:
+        scale = title_width / table_width
+        widths = [math.ceil(width * scale) for width in widths]
+
+    # Cells are left aligned and followed by a space of padding. The cells and
+    # the borders are separated by spaces, and the rule under the header by
+    # dashes.
+    def format_row(cells):
+        return " " + "".join(f"{cell:<{width}}  " for cell, width in zip(cells, widths))
+
+    rule = " " + "".join("-" * (width + 1) + " " for width in widths)
+
+    # The rule above the title runs the whole width of the table without any
+    # junctions
+    title_rule = " " + "-" * (len(rule) - 2) + " "
 
-    table.align = "l"
-    table._hrules = None
-    table.left_padding_width = 0
-    table.right_padding_width = 1
-    table.vertical_char = " "
-    table.horizontal_char = "-"
-    table.junction_char = " "
+    # Center the title. When it can't be centered exactly, the extra space goes
+    # on the right of titles with an odd length and on the left of even ones.
+    excess = len(rule) - 2 - len(title)
+    left = excess // 2 + (excess % 2 if len(title) % 2 == 0 else 0)
+    title_line = " " + " " * left + title + " " * (excess - left) + " "
 
-    return table
+    lines = [title_rule, title_line, format_row(field_names), rule]
+    lines.extend(format_row(row) for row in rows)
+
+    return "\n".join(lines)
+
+
+def get_text_size(table_text):
+    if not table_text.isascii():
+        return FONT.getsize_multiline(table_text)
+
+    lines = table_text.split("\n")
+    shape = (max(map(len, lines)), len(lines))
+
+    # Only measure the text the first time a table of this shape is rendered
+    size = _text_size_cache.get(shape)
+    if size is None:
+        size = FONT.getsize_multiline(table_text)
+        _text_size_cache[shape] = size
+    return size
 
 
 def create_image_from_table(table_text):
-    # Define font and font size
-    font = ImageFont.truetype("Inconsolata/static/Inconsolata-Medium.ttf", 20)
-    
     # Getting the size of the table to create the size of the blank image
-    box = font.getsize_multiline(table_text)
+    box = get_text_size(table_text)
 
     # Set the background color. Add 10 to the table width and 32 to the height
     # for margins
@@ -37,11 +81,13 @@ def create_image_from_table(table_text):
     draw = ImageDraw.Draw(image)
 
     # Insert the text
-    draw.text((5, 5), table_text, font=font, fill="#bbbcbf")
+    draw.text((5, 5), table_text, font=FONT, fill="#bbbcbf")
 
-    # Save the image to a binary stream and reset the pointer
+    # Save the image to a binary stream and reset the pointer. The images are
+    # small, so the fastest compression level is used to save encoding time
+    # at the cost of slightly larger files.
     image_stream = io.BytesIO()
-    image.save(image_stream, format="PNG")
+    image.save(image_stream, format="PNG", compress_level=1, optimize=False)
     image_stream.seek(0)
     
     return image_stream
@@ -6,9 +6,11 @@ from globals import *
 from discord import utils
 from dotenv import load_dotenv
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 import logging
+import threading
 
 # Get logger for current module
 logger = logging.getLogger(__name__)
@@ -17,6 +19,26 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 MODERATOR_ROLE_ID = os.getenv("MODERATOR_ROLE_ID")
 
+# Round ID of the last score written to the scores spreadsheet, or None if the
+# spreadsheet has to be rewritten in full on the next sync
+last_synced_round_id = None
+
+# Round IDs are handed out when a score is inserted, but concurrent
+# verifications can commit out of order, so a score with a lower round ID can
+# show up after a higher one has been synced. Each incremental sync looks this
+# many round IDs back from the last synced one to pick those up.
+SYNC_RECHECK_ROUNDS = 50
+
+# Round IDs already written to the spreadsheet within the recheck window, so
+# rechecked scores aren't written twice
+synced_round_ids = set()
+
+# Only one sync may read and move the sync position at a time
+spreadsheet_sync_lock = threading.Lock()
+
+# Clears the spreadsheet in the background while a sync reads the database
+sheets_executor = ThreadPoolExecutor(max_workers=1)
+
 
 def get_moderator_role(ctx):
     """
@@ -32,51 +54,153 @@ def get_moderator_role(ctx):
     return utils.get(ctx.guild.roles, id=int(MODERATOR_ROLE_ID))
 
 
-def fill_db_spreadsheet():
-    try:
-        # Fill scores spreadsheet
+def reset_spreadsheet_sync():
+    """
+    Make the next spreadsheet sync rewrite the scores spreadsheet in full.
+
+    Parameters:
+        none
+
+    Returns:
+        none
+    """
+
+    global last_synced_round_id
+
+    with spreadsheet_sync_lock:
+        last_synced_round_id = None
+        synced_round_ids.clear()
+
+
+def fill_db_spreadsheet(incremental=False):
+    """
+    Write the scores and players tables to the database spreadsheet.
+
+    An incremental sync only appends the scores added since the last sync. The
+    scores spreadsheet is rewritten in full if an incremental sync isn't
+    requested, or if there is no previous sync to continue from.
+
+    Parameters:
+        incremental (bool): Whether to only append the newly added scores.
+
+    Returns:
+        none
+    """
+
+    with spreadsheet_sync_lock:
+        _fill_db_spreadsheet(incremental)
+
+
+def _fill_db_spreadsheet(incremental):
+
+    global last_synced_round_id
+
+    incremental = incremental and last_synced_round_id is not None
+
+    # The scores spreadsheet is cleared in the background while the database is
+    # being read. Until the scores are written again, the next sync has to
+    # rewrite them in full.
+    if not incremental:
+        scores_cleared = sheets_executor.submit(sheets_helper.batch_clear, DB_SPREADSHEET_ID, ["Scores!A2:F"])
+        last_synced_round_id = None
+        synced_round_ids.clear()
+
+    # Fill scores spreadsheet
+    if incremental:
+        query = f"""
+            SELECT round_id, timestamp, course_id, player_id, character, score
+            FROM {SCORES_TABLE}
+            WHERE round_id > %s
+            ORDER BY round_id;
+        """
+        rows = db_helper.iter_select(query, (last_synced_round_id - SYNC_RECHECK_ROUNDS,))
+    else:
         query = f"""
-            SELECT timestamp, course_id, player_id, character, score
+            SELECT round_id, timestamp, course_id, player_id, character, score
             FROM {SCORES_TABLE}
             ORDER BY round_id;
         """
-        sheet = [list(row) for row in db_helper.select(query)]
+        rows = db_helper.iter_select(query)
 
-        # Clear the spreadsheet before writing
-        sheets_helper.clear(DB_SPREADSHEET_ID, "Scores", "A2:F")
+    sheet = []
+    round_ids = []
+
+    for round_id, timestamp, course_id, player_id, character, score in rows:
+        # Skip rechecked scores that are already in the spreadsheet
+        if round_id in synced_round_ids:
+            continue
 
         # Change every player ID to a string so it doesn't get truncated by the sheet
-        for i in range(len(sheet)):
-            sheet[i][2] = str(sheet[i][2])
+        sheet.append([timestamp, course_id, str(player_id), character, score])
+        round_ids.append(round_id)
+
+    now = datetime.utcnow()
+    formatted_time = now.strftime("%m/%d/%Y %H:%M:%S")
+    last_updated_msg = f"Last sync (UTC): {formatted_time}"
+
+    # Everything that is rewritten is collected here and written to the
+    # spreadsheet in a single request
+    updates = []
+
+    if incremental:
+        if sheet:
+            sheets_helper.append_data(DB_SPREADSHEET_ID, sheet, "Scores", "A1:E")
+            advance_spreadsheet_sync(round_ids)
+        logger.info(f"Appended {len(sheet)} new scores to the spreadsheet.")
+    else:
         header = ("timestamp", "course_id", "player_id", "character", "score")
         sheet.insert(0, header)
-        sheets_helper.write_data(DB_SPREADSHEET_ID, sheet, "Scores", "A1")
-
-        now = datetime.utcnow()
-        formatted_time = now.strftime("%m/%d/%Y %H:%M:%S")
-        last_updated_msg = f"Last sync (UTC): {formatted_time}"
-        sheets_helper.write_data(
-            DB_SPREADSHEET_ID, [[last_updated_msg]], "Scores", "F1")
-        
-        # Fill players spreadsheet
-        query = f"""
-            SELECT discord_id, player_name
-            FROM {PLAYERS_TABLE};
-        """
-        sheet = [list(row) for row in db_helper.select(query)]
+        updates.append((sheet, "Scores", "A1"))
 
-        # Clear the spreadsheet before writing
-        sheets_helper.clear(DB_SPREADSHEET_ID, "Players", "A2:C")
+    updates.append(([[last_updated_msg]], "Scores", "F1"))
+    
+    # Fill players spreadsheet. The players spreadsheet is only cleared once
+    # the scores are read, right before it is rewritten.
+    players_cleared = sheets_executor.submit(sheets_helper.batch_clear, DB_SPREADSHEET_ID, ["Players!A2:C"])
 
-        # Change every player ID to a string so it doesn't get truncated by the sheet
-        for i in range(len(sheet)):
-            sheet[i][0] = str(sheet[i][0])
-        header = ("player_id", "player_name")
-        sheet.insert(0, header)
-        sheets_helper.write_data(DB_SPREADSHEET_ID, sheet, "Players", "A1")
-        sheets_helper.write_data(
-            DB_SPREADSHEET_ID, [[last_updated_msg]], "Players", "C1")
+    query = f"""
+        SELECT discord_id, player_name
+        FROM {PLAYERS_TABLE};
+    """
+    # Change every player ID to a string so it doesn't get truncated by the sheet
+    sheet = [[str(player_id), player_name]
+             for player_id, player_name in db_helper.iter_select(query)]
+
+    header = ("player_id", "player_name")
+    sheet.insert(0, header)
+    updates.append((sheet, "Players", "A1"))
+    updates.append(([[last_updated_msg]], "Players", "C1"))
+
+    # The sheets have to be cleared before they are written
+    if not incremental:
+        scores_cleared.result()
+    players_cleared.result()
+    sheets_helper.batch_write(DB_SPREADSHEET_ID, updates)
+
+    # Only move the sync forward once the scores have been written
+    if not incremental and round_ids:
+        advance_spreadsheet_sync(round_ids)
+
+
+def advance_spreadsheet_sync(round_ids):
+    """
+    Record that the scores with the given round IDs were written to the scores
+    spreadsheet.
+
+    Parameters:
+        round_ids (list of int): The round IDs of the written scores, in
+            ascending order.
+
+    Returns:
+        none
+    """
+
+    global last_synced_round_id
+
+    if last_synced_round_id is None or round_ids[-1] > last_synced_round_id:
+        last_synced_round_id = round_ids[-1]
 
-    except Exception as e:
-        print(e)
-        raise
\ No newline at end of file
+    # Only the round IDs that the next sync rechecks have to be remembered
+    oldest_rechecked = last_synced_round_id - SYNC_RECHECK_ROUNDS
+    synced_round_ids.update(round_id for round_id in round_ids if round_id > oldest_rechecked)
+    synced_round_ids.difference_update([round_id for round_id in synced_round_ids if round_id <= oldest_rechecked])